@@ -1,33 +1,74 @@
 #!/usr/bin/env python3
 import argparse
+import diskcache
+import functools
+import hashlib
+import io
+import itertools
 import logging
+import os
 import requests
 import sys
+import threading
+from array import array
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from urllib.parse import urlsplit
 from lxml import etree
 from oauthcli import OpenStreetMapDevAuth
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 
 
 OSM_API = 'https://api.openstreetmap.org/api/0.6/'
 SANDBOX_API = 'https://master.apis.dev.openstreetmap.org/api/0.6/'
 OVERPASS_API = 'http://overpass-api.de/api'
+# Overpass default memory limit, spelled out: plenty for the 0.01 deg² bbox limit,
+# and a larger value would only make the query harder for the server to admit.
+OVERPASS_MAXSIZE = 512 * 1024 * 1024
 CREATED_BY = 'OSM Dev Copy 1.0'
 SORT_ORDER = {'node': 0, 'way': 1, 'relation': 2}
+TIMEOUT = (10, 300)
+# Largest bbox the OSM API serves from /map, in square degrees.
+MAX_API_AREA = 0.25
+# Keep it low to stay polite to the sandbox API.
+API_THREADS = 4
+
+CACHE_DIR = os.path.join(os.path.expanduser('~'), '.cache', 'osm_to_sandbox')
+CACHE_TTL = 24 * 3600
+
+# One keep-alive session per host and retry mode, so that repeated calls reuse connections.
+_SESSIONS = {}
+_SESSIONS_LOCK = threading.Lock()
+_CACHE = None
+
+# Member and node refs are kept as integers to save memory.
+Member = namedtuple('Member', 'type ref role')
 
 
 class OsmObject:
+    __slots__ = ('type', 'id', 'version', 'lon', 'lat', 'tags', 'nodes', 'members')
+
     def __init__(self, node):
-        self.type = node.tag
+        self.type = sys.intern(node.tag)
         self.id = node.get('id')
         self.version = node.get('version')
         self.lon = node.get('lon')
         self.lat = node.get('lat')
         self.tags = {}
-        for tag in node.findall('tag'):
-            self.tags[tag.get('k')] = tag.get('v')
-        self.nodes = [nd.get('ref') for nd in node.findall('nd')]
+        self.nodes = array('q')
         self.members = []
-        for m in node.findall('member'):
-            self.members.append((m.get('type'), m.get('ref'), m.get('role')))
+        for child in node:
+            tag = child.tag
+            get = child.get
+            if tag == 'tag':
+                # Keys and roles repeat a lot, values mostly do not
+                self.tags[sys.intern(get('k'))] = get('v')
+            elif tag == 'nd':
+                self.nodes.append(int(get('ref')))
+            elif tag == 'member':
+                self.members.append(Member(
+                    sys.intern(get('type')), int(get('ref')), sys.intern(get('role'))))
 
     @property
     def sid(self):
@@ -44,37 +85,28 @@ class OsmObject:
         lat = float(self.lat)
         return lon >= bbox[0] and lon <= bbox[2] and lat >= bbox[1] and lat <= bbox[3]
 
-    def delete_xml(self, changeset=None):
-        el = etree.Element(
-            self.type,
-            id=self.id,
-            version=self.version,
-            changeset=changeset,
-            visible='false',
-        )
+    def xml_attrib(self, changeset, visible):
+        attrib = {'id': self.id, 'version': self.version}
         if changeset:
-            el.set('changeset', changeset)
-        return el
+            attrib['changeset'] = changeset
+        attrib['visible'] = visible
+        return attrib
+
+    def delete_xml(self, changeset=None):
+        return etree.Element(self.type, self.xml_attrib(changeset, 'false'))
 
     def create_xml(self, changeset=None):
-        el = etree.Element(
-            self.type,
-            id=self.id,
-            version=self.version,
-            changeset=changeset,
-            visible='true',
-        )
-        if changeset:
-            el.set('changeset', changeset)
+        attrib = self.xml_attrib(changeset, 'true')
         if self.lon and self.lat:
-            el.set('lon', self.lon)
-            el.set('lat', self.lat)
+            attrib['lon'] = self.lon
+            attrib['lat'] = self.lat
+        el = etree.Element(self.type, attrib)
         for k, v in self.tags.items():
             etree.SubElement(el, 'tag', k=k, v=v)
         for ref in self.nodes:
-            etree.SubElement(el, 'nd', ref=ref)
+            etree.SubElement(el, 'nd', ref=str(ref))
         for m in self.members:
-            etree.SubElement(el, 'member', type=m[0], ref=m[1], role=m[2])
+            etree.SubElement(el, 'member', type=m.type, ref=str(m.ref), role=m.role)
         return el
 
 
@@ -99,18 +131,25 @@ class Uploader:
         self.changeset = resp.strip()
         return self
 
-    def upload(self, root):
+    def upload(self, data):
         try:
-            resp = api_request(
+            raw = api_request(
                 self.server, f'changeset/{self.changeset}/upload', method='POST',
-                auth=self.auth, data=etree.tostring(root))
+                stream_result=True, auth=self.auth, data=data)
         except HTTPError as e:
             raise IOError(f'Failed to erase data from the sandbox: {e}')
 
         # Return id mapping
-        id_map = {}
-        for diff in resp:
-            id_map[(diff.tag, diff.get('old_id'))] = diff.get('new_id')
+        id_map = new_id_map()
+        try:
+            for _, diff in etree.iterparse(raw, events=('end',), tag=('node', 'way', 'relation')):
+                new_id = diff.get('new_id')
+                # Deleted elements come back without new ids
+                if new_id is not None:
+                    id_map[diff.tag][int(diff.get('old_id'))] = int(new_id)
+                free_element(diff)
+        finally:
+            release_stream(raw)
         return id_map
 
     def __exit__(self, type, value, tb):
@@ -169,24 +208,56 @@ class AuthPromptAction(argparse.Action):
         setattr(args, self.dest, auth_object)
 
 
+def make_adapter(retry=True):
+    # Only idempotent GETs are retried: a retried PUT could open a second changeset.
+    # The last response is returned as is, so that callers can handle its status.
+    max_retries = Retry(total=3, backoff_factor=0.3, status_forcelist=[502, 503, 504],
+                        allowed_methods=frozenset(['GET']), raise_on_status=False)
+    return HTTPAdapter(pool_connections=4, pool_maxsize=16,
+                       max_retries=max_retries if retry else 0)
+
+
+def setup_session(session, retry=True):
+    """Mounts the pooled adapter and sets the default headers, once per session."""
+    adapter = make_adapter(retry)
+    session.mount('http://', adapter)
+    session.mount('https://', adapter)
+    session.headers['Content-Type'] = 'application/xml'
+    return session
+
+
+def get_session(server, retry=True):
+    key = (urlsplit(server).netloc, retry)
+    with _SESSIONS_LOCK:
+        session = _SESSIONS.get(key)
+        if session is None:
+            session = _SESSIONS[key] = setup_session(requests.Session(), retry)
+    return session
+
+
 def api_request(server, endpoint, method='GET', params=None,
-                raw_result=False, auth=None, **kwargs):
-    headers = {}
-    headers['Content-Type'] = 'application/xml'
+                raw_result=False, stream_result=False, auth=None, **kwargs):
+    kwargs.setdefault('timeout', TIMEOUT)
+    if stream_result:
+        kwargs['stream'] = True
     if auth:
-        resp = auth.request(method, endpoint, params=params, headers=headers, **kwargs)
+        resp = auth.request(method, endpoint, params=params, **kwargs)
     else:
-        resp = requests.request(method, server + endpoint, params=params, headers=headers, **kwargs)
+        resp = get_session(server).request(method, server + endpoint, params=params, **kwargs)
     resp.encoding = 'utf-8'
     if resp.status_code != 200:
         raise HTTPError(resp.status_code, resp.url, resp.text)
+    if stream_result:
+        resp.raw.decode_content = True
+        return resp.raw
     if resp.content and not raw_result:
         return etree.fromstring(resp.content)
     return resp.text
 
 
-def get_changeset_size(auth_object):
-    data = api_request(SANDBOX_API, 'capabilities', auth=auth_object)
+@functools.lru_cache(maxsize=4)
+def get_changeset_size(endpoint):
+    data = api_request(endpoint, 'capabilities')
     try:
         return int(data.find('api').find('changesets').get('maximum_elements'))
     except AttributeError:
@@ -194,6 +265,57 @@ def get_changeset_size(auth_object):
         return 10000
 
 
+def free_element(el):
+    """Clears an element parsed with iterparse, together with its preceding siblings."""
+    el.clear()
+    while el.getprevious() is not None:
+        del el.getparent()[0]
+
+
+def parse_osm_stream(fileobj, remarks=None):
+    """Yields OsmObjects from an XML stream, freeing each element after use.
+    Overpass remarks, which mean the response was cut short, go to remarks."""
+    tags = ('node', 'way', 'relation', 'remark')
+    for _, el in etree.iterparse(fileobj, events=('end',), tag=tags):
+        if el.tag == 'remark':
+            if remarks is not None:
+                remarks.append((el.text or '').strip())
+        else:
+            yield OsmObject(el)
+        free_element(el)
+
+
+def release_stream(raw):
+    # Read the rest so that the connection can go back to the pool.
+    raw.drain_conn()
+    raw.release_conn()
+
+
+def read_elements(raw, remarks=None):
+    try:
+        return {obj.sid: obj for obj in parse_osm_stream(raw, remarks)}
+    finally:
+        release_stream(raw)
+
+
+def get_cache():
+    global _CACHE
+    if _CACHE is None:
+        _CACHE = diskcache.Cache(CACHE_DIR)
+    return _CACHE
+
+
+def bbox_area(bbox):
+    return (bbox[2] - bbox[0]) * (bbox[3] - bbox[1])
+
+
+def presplit_bbox(bbox):
+    """Splits a bbox the API would reject for its size without asking it first."""
+    if bbox_area(bbox) <= MAX_API_AREA:
+        return [bbox]
+    return [small for part in split_bbox(bbox) for small in presplit_bbox(part)]
+
+
 def split_bbox(bbox):
     half_x = (bbox[0] + bbox[2]) / 2
     half_y = (bbox[1] + bbox[3]) / 2
@@ -205,68 +327,122 @@ def split_bbox(bbox):
     ]
 
 
+def download_bbox(bbox, endpoint):
+    raw = api_request(endpoint, 'map', params={'bbox': ','.join(str(x) for x in bbox)},
+                      stream_result=True)
+    return read_elements(raw)
+
+
 def download_from_api(bbox, endpoint):
+    # Overpass queues parallel requests anyway and punishes them with HTTP 429,
+    # so splitting and fanning out is only done against the OSM API.
+    if endpoint not in (OSM_API, SANDBOX_API):
+        raise ValueError(f'Not an OSM API endpoint: {endpoint}')
+    data = {}
+    queue = presplit_bbox(bbox)
+    with ThreadPoolExecutor(max_workers=API_THREADS) as executor:
+        while queue:
+            futures = {executor.submit(download_bbox, part, endpoint): part for part in queue}
+            queue = []
+            for future in as_completed(futures):
+                try:
+                    data.update(future.result())
+                except HTTPError as e:
+                    if e.code == 400:
+                        # Area too large, split bbox in four
+                        queue.extend(split_bbox(futures[future]))
+                    elif e.code == 509:
+                        raise Exception(
+                            f'You have been blocked from API for downloading too much: {e}')
+                    else:
+                        raise
+    return data
+
+
+def read_cached_elements(cache, key, cached, remarks=None):
+    """Parses a cached response, evicting it when it is broken or incomplete."""
     try:
-        tree = api_request(endpoint, 'map', params={'bbox': ','.join(str(x) for x in bbox)})
-        lst = [OsmObject(obj) for obj in tree if obj.tag in ('node', 'way', 'relation')]
-        return {obj.sid: obj for obj in lst}
-    except HTTPError as e:
-        if e.code == 400:
-            # Area too large, split bbox in four
-            data = {}
-            for part in split_bbox(bbox):
-                more_data = download_from_api(part, endpoint)
-                data.update(more_data)
-            return data
-        elif e.code == 509:
-            raise Exception(f'You have been blocked from API for downloading too much: {e}')
-
-
-def download_from_overpass(bbox, overpass_api, filter_str=None, date_str=None):
+        with cached:
+            elements = {obj.sid: obj for obj in parse_osm_stream(cached, remarks)}
+    except Exception:
+        cache.delete(key)
+        raise
+    if remarks:
+        cache.delete(key)
+    return elements
+
+
+def download_from_overpass(bbox, overpass_api, filter_str=None, date_str=None, use_cache=True):
     bbox_para = ','.join(str(bbox[i]) for i in (1, 0, 3, 2))
     date_para = f'[date:"{date_str}"]' if date_str else ""
     filter_para = f'[{filter_str}]' if filter_str else ""
-    query = (f'[timeout:300]{date_para}[bbox:{bbox_para}];'
+    # Always a single query: see download_from_api for why it is never split.
+    query = (f'[timeout:300][maxsize:{OVERPASS_MAXSIZE}]{date_para}[bbox:{bbox_para}];'
              f'(nwr{filter_para};>;);'
              # 'nwr._;'
              # The above line will produce results equivalent to the former version of the tool
              # but may destroy larger objects.
              'out meta qt;')
-    resp = requests.get(f'{overpass_api}/interpreter', {'data': query})
+
+    cache = get_cache() if use_cache else None
+    if cache is not None:
+        key = hashlib.sha1(repr((overpass_api, query)).encode()).hexdigest()
+        cached = cache.get(key, read=True)
+        if cached is not None:
+            logging.info('Using cached Overpass API response.')
+            return read_cached_elements(cache, key, cached)
+
+    # Heavy Overpass queries are not retried, to avoid piling up load there.
+    session = get_session(overpass_api, retry=False)
+    resp = session.get(f'{overpass_api}/interpreter', params={'data': query},
+                       timeout=TIMEOUT, stream=True)
     if resp.status_code != 200:
         if 'rate_limited' in resp.text:
-            resp = requests.get(f'{overpass_api}/status')
+            resp = session.get(f'{overpass_api}/status', timeout=TIMEOUT)
             logging.error(resp.text)
             raise Exception('You are rate limited')
         raise Exception('Could not download data from Overpass API: ' + resp.text)
-    tree = etree.fromstring(resp.content)
-    lst = [OsmObject(obj) for obj in tree if obj.tag in ('node', 'way', 'relation')]
-    return {obj.sid: obj for obj in lst}
+    resp.raw.decode_content = True
+    remarks = []
+    if cache is None:
+        elements = read_elements(resp.raw, remarks)
+    else:
+        # Store the raw XML, streaming it to disk, and parse it from there.
+        with resp:
+            cache.set(key, resp.raw, read=True, expire=CACHE_TTL)
+        elements = read_cached_elements(cache, key, cache.get(key, read=True), remarks)
+    if remarks:
+        # Uploading partial data would still wipe the whole area on the sandbox.
+        raise Exception('Overpass API response is incomplete: ' + '; '.join(remarks))
+    return elements
 
 
 def filter_by_bbox(elements, bbox):
-    for sid in list(elements.keys()):
-        el = elements[sid]
+    doomed = set()
+    for sid, el in elements.items():
         if not el.is_inside(bbox):
-            del elements[sid]
+            doomed.add(sid)
         elif any(1 for m in el.members if m[0] == 'relation'):
             # Noping out of relations inside relations
-            del elements[sid]
+            doomed.add(sid)
+    for sid in doomed:
+        del elements[sid]
 
 
 def delete_missing(elements):
-    nodes = set(el.id for el in elements.values() if el.type == 'node')
-    for sid in list(elements.keys()):
-        if any(1 for ref in elements[sid].nodes if ref not in nodes):
-            del elements[sid]
+    nodes = {int(el.id) for el in elements.values() if el.type == 'node'}
+    doomed = {sid for sid, el in elements.items()
+              if any(1 for ref in el.nodes if ref not in nodes)}
+    for sid in doomed:
+        del elements[sid]
 
-    ways = [el.id for el in elements.values() if el.type == 'way']
-    for sid in list(elements.keys()):
-        for m in elements[sid].members:
-            if ((m[0] == 'node' and m[1] not in nodes) or
-                    (m[0] == 'way' and m[1] not in ways)):
-                del elements[sid]
-                break
+    ways = {int(el.id) for el in elements.values() if el.type == 'way'}
+    doomed = {sid for sid, el in elements.items()
+              if any(1 for m in el.members
+                     if (m[0] == 'node' and m[1] not in nodes) or
+                        (m[0] == 'way' and m[1] not in ways))}
+    for sid in doomed:
+        del elements[sid]
 
 
 def delete_unreferenced_nodes(elements):
@@ -274,76 +450,114 @@ def delete_unreferenced_nodes(elements):
     for el in elements.values():
         nodes.update(el.nodes)
         nodes.update(m[1] for m in el.members if m[0] == 'node')
-    for sid in list(elements.keys()):
-        el = elements[sid]
-        if el.type == 'node' and el.id not in nodes and not el.tags:
-            del elements[sid]
+    doomed = {sid for sid, el in elements.items()
+              if el.type == 'node' and int(el.id) not in nodes and not el.tags}
+    for sid in doomed:
+        del elements[sid]
+
+
+def write_osc(fileobj, action, xml_elements, attrib=None, pretty_print=False):
+    """Streams an osmChange document with a single action block to a binary file."""
+    newline = '\n' if pretty_print else ''
+    with etree.xmlfile(fileobj, encoding='utf-8') as xf:
+        xf.write_declaration()
+        with xf.element('osmChange', version='0.6', generator=CREATED_BY):
+            xf.write(newline)
+            with xf.element(action, attrib or {}):
+                xf.write(newline)
+                for el in xml_elements:
+                    xf.write(el, pretty_print=pretty_print)
+            xf.write(newline)
 
 
 def upload_delete(elements, auth_object):
     with Uploader(SANDBOX_API, auth_object, 'Clearing an area before uploading') as u:
-        root = etree.Element('osmChange', version='0.6', generator=CREATED_BY)
-        delete = etree.SubElement(root, 'delete')
-        delete.set('if-unused', 'true')
-        for el in elements:
-            delete.append(el.delete_xml(u.changeset))
-        u.upload(root)
+        buf = io.BytesIO()
+        write_osc(buf, 'delete', (el.delete_xml(u.changeset) for el in elements),
+                  {'if-unused': 'true'})
+        u.upload(buf.getvalue())
+
+
+def split_batches(values, max_el):
+    """Splits sorted values into phases, one per element type, each holding
+    a list of batches. Batches within a phase are independent and can be
+    uploaded in parallel, while phases must go one after another.
+    When everything fits into one changeset, returns a single mixed batch."""
+    if len(values) <= max_el:
+        return [[values]]
+    phases = []
+    for _, group in itertools.groupby(values, key=lambda el: el.type):
+        group = list(group)
+        phases.append([group[i:i + max_el] for i in range(0, len(group), max_el)])
+    return phases
 
 
 def delete_elements(elements, auth_object):
-    max_el = get_changeset_size(auth_object)
+    max_el = get_changeset_size(SANDBOX_API)
     values = list(elements.values())
     values.sort(key=lambda el: el.sort_key, reverse=True)
-    for i in range(0, len(values), max_el):
-        upload_delete(values[i:i + max_el], auth_object)
+    with ThreadPoolExecutor(max_workers=API_THREADS) as executor:
+        for batches in split_batches(values, max_el):
+            list(executor.map(lambda part: upload_delete(part, auth_object), batches))
 
 
 def upload_create(elements, auth_object):
     with Uploader(SANDBOX_API, auth_object, 'Copying data from OSM') as u:
-        root = etree.Element('osmChange', version='0.6', generator=CREATED_BY)
-        create = etree.SubElement(root, 'create')
-        for el in elements:
-            create.append(el.create_xml(u.changeset))
-        return u.upload(root)
+        buf = io.BytesIO()
+        write_osc(buf, 'create', (el.create_xml(u.changeset) for el in elements))
+        return u.upload(buf.getvalue())
+
+
+def new_id_map():
+    """Returns an empty id mapping: a dict of old to new ids for each element type."""
+    return {t: {} for t in SORT_ORDER}
 
 
 def renumber(values, id_map):
+    node_map = id_map['node']
     for v in values:
-        if (v.type, v.id) in id_map:
-            v.id = str(id_map[(v.type, v.id)])
-        v.nodes = [str(id_map.get(('node', ref), ref)) for ref in v.nodes]
-        v.members = [(m[0], str(id_map.get((m[0], m[1]), m[1])), m[2]) for m in v.members]
+        own_map = id_map[v.type]
+        old_id = int(v.id)
+        if old_id in own_map:
+            v.id = str(own_map[old_id])
+        v.nodes = array('q', (node_map.get(ref, ref) for ref in v.nodes))
+        v.members = [m._replace(ref=id_map[m.type].get(m.ref, m.ref)) for m in v.members]
 
 
 def renumber_for_creating(values):
     new_id = -1
-    id_map = {}
+    id_map = new_id_map()
     for v in values:
-        id_map[(v.type, v.id)] = new_id
+        id_map[v.type][int(v.id)] = new_id
         new_id -= 1
     renumber(values, id_map)
 
 
 def upload_elements(elements, auth_object):
-    max_el = get_changeset_size(auth_object)
+    max_el = get_changeset_size(SANDBOX_API)
     values = list(elements.values())
     values.sort(key=lambda el: el.sort_key)
     renumber_for_creating(values)
-    for i in range(0, len(values), max_el):
-        id_map = upload_create(values[i:i + max_el], auth_object)
-        renumber(values, id_map)
-
-
-def write_osc_and_exit(elements, fileobj):
-    root = etree.Element('osmChange', version='0.6', generator=CREATED_BY)
-    create = etree.SubElement(root, 'create')
-    for el in elements.values():
-        create.append(el.create_xml('1'))
-    fileobj.write(etree.tostring(root, encoding='unicode', pretty_print=True))
+    # Batches only reference elements from earlier phases, so each one
+    # is renumbered once, right before it is uploaded.
+    id_map = new_id_map()
+    with ThreadPoolExecutor(max_workers=API_THREADS) as executor:
+        for batches in split_batches(values, max_el):
+            for part in batches:
+                renumber(part, id_map)
+            for part_map in executor.map(lambda part: upload_create(part, auth_object), batches):
+                for el_type, type_map in part_map.items():
+                    id_map[el_type].update(type_map)
+
+
+def write_osc_and_exit(elements, fileobj, pretty_print=False):
+    write_osc(fileobj, 'create', (el.create_xml('1') for el in elements.values()),
+              pretty_print=pretty_print)
     sys.exit(0)
 
 
-def main(bbox, auth_object, overpass_api=OVERPASS_API, filter_str=None, date_str=None):
+def main(bbox, auth_object, overpass_api=OVERPASS_API, filter_str=None, date_str=None,
+         use_cache=True):
     logging.basicConfig(level=logging.INFO, format='%(message)s')
     if len(bbox) != 4:
         raise ValueError('Please specify four numbers for the bbox')
@@ -351,8 +565,9 @@ def main(bbox, auth_object, overpass_api=OVERPASS_API, filter_str=None, date_str
         bbox[2], bbox[0] = bbox[0], bbox[2]
     if bbox[1] > bbox[3]:
         bbox[3], bbox[1] = bbox[1], bbox[3]
-    if (bbox[2] - bbox[0]) * (bbox[3] - bbox[1]) > 0.01:
+    if bbox_area(bbox) > 0.01:
         raise ValueError('Bounding box is too big, try 10×10 km')
+    setup_session(auth_object.session)
 
     sandbox_elements = download_from_api(bbox, SANDBOX_API)
     if len(sandbox_elements) > 10000:
@@ -368,7 +583,8 @@ def main(bbox, auth_object, overpass_api=OVERPASS_API, filter_str=None, date_str
     elements = download_from_overpass(bbox,
                                       overpass_api,
                                       filter_str=filter_str,
-                                      date_str=date_str)
+                                      date_str=date_str,
+                                      use_cache=use_cache)
     filter_by_bbox(elements, bbox)
     delete_missing(elements)
     delete_unreferenced_nodes(elements)
@@ -378,7 +594,7 @@ def main(bbox, auth_object, overpass_api=OVERPASS_API, filter_str=None, date_str
     else:
         logging.info(f'Downloaded {len(elements)} elements.')
 
-    # write_osc_and_exit(elements, open('test.osc', 'w'))
+    # write_osc_and_exit(elements, open('test.osc', 'wb'), pretty_print=True)
 
     if sandbox_elements:
         logging.info('Clearing the area on the sandbox server.')
@@ -399,7 +615,8 @@ def cli():
     parser = add_args(parser)
     args = parser.parse_args()
     bbox = [float(x.strip()) for x in args.bbox.split(',')]
-    main(bbox, args.auth_object, args.overpass_api, args.filter, args.date)
+    main(bbox, args.auth_object, args.overpass_api, args.filter, args.date,
+         use_cache=not args.no_cache)
 
 
 def add_args(parser):
@@ -437,6 +654,11 @@ def add_args(parser):
                         dest='date',
                         default=None,
                         type=str)
+    parser.add_argument("--no-cache",
+                        help="Always download fresh data from Overpass API instead of reusing "
+                             "a response cached during the last day.",
+                        dest='no_cache',
+                        action='store_true')
     return parser
 
 
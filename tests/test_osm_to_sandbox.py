@@ -0,0 +1,211 @@
+import io
+from unittest import mock
+
+import pytest
+from lxml import etree
+
+from osm_to_sandbox import osm_to_sandbox as ots
+
+
+OSM_XML = b'''<osm>
+<node id="1" version="2" lon="1.0" lat="2.0"><tag k="amenity" v="bench"/></node>
+<node id="2" version="1" lon="1.1" lat="2.1"/>
+<way id="3" version="1"><nd ref="1"/><nd ref="2"/></way>
+</osm>'''
+
+
+class FakeRaw(io.BytesIO):
+    def drain_conn(self):
+        pass
+
+    def release_conn(self):
+        pass
+
+
+def parse(data):
+    return {obj.sid: obj for obj in ots.parse_osm_stream(io.BytesIO(data))}
+
+
+def fake_api(diff_result, sent=None):
+    def api_request(server, endpoint, method='GET', params=None,
+                    raw_result=False, stream_result=False, auth=None, **kwargs):
+        if endpoint == 'changeset/create':
+            return '42'
+        if endpoint.endswith('/upload'):
+            if sent is not None:
+                sent.append(kwargs['data'])
+            return FakeRaw(diff_result)
+        return ''
+    return api_request
+
+
+def test_upload_delete_without_new_ids():
+    elements = parse(OSM_XML)
+    diff = (b'<diffResult version="0.6"><node old_id="1"/><node old_id="2"/>'
+            b'<way old_id="3"/></diffResult>')
+    sent = []
+    with mock.patch.object(ots, 'api_request', side_effect=fake_api(diff, sent)):
+        ots.upload_delete(list(elements.values()), None)
+        with ots.Uploader(ots.SANDBOX_API, None, 'test') as u:
+            assert u.upload(b'') == {'node': {}, 'way': {}, 'relation': {}}
+    body = etree.fromstring(sent[0])
+    assert body[0].tag == 'delete' and body[0].get('if-unused') == 'true'
+    assert [(el.tag, el.get('id'), el.get('changeset')) for el in body[0]] == [
+        ('node', '1', '42'), ('node', '2', '42'), ('way', '3', '42')]
+
+
+def test_upload_create_id_map_per_type():
+    elements = parse(OSM_XML)
+    values = sorted(elements.values(), key=lambda el: el.sort_key)
+    ots.renumber_for_creating(values)
+    diff = (b'<diffResult version="0.6">'
+            b'<node old_id="-1" new_id="101" new_version="1"/>'
+            b'<node old_id="-2" new_id="102" new_version="1"/>'
+            b'<way old_id="-3" new_id="103" new_version="1"/>'
+            b'<relation old_id="-9"/></diffResult>')
+    with mock.patch.object(ots, 'api_request', side_effect=fake_api(diff)):
+        id_map = ots.upload_create(values, None)
+    assert id_map == {'node': {-1: 101, -2: 102}, 'way': {-3: 103}, 'relation': {}}
+
+
+def test_split_batches():
+    values = sorted(parse(OSM_XML).values(), key=lambda el: el.sort_key)
+    assert ots.split_batches(values, 10) == [[values]]
+    assert ots.split_batches(values, 1) == [[values[:1], values[1:2]], [values[2:]]]
+
+
+def test_adapter_returns_last_response():
+    retry = ots.make_adapter().max_retries
+    assert not retry.raise_on_status
+    assert ots.make_adapter(retry=False).max_retries.total == 0
+
+
+def test_parse_collects_remarks():
+    remarks = []
+    data = OSM_XML.replace(b'</osm>', b'<remark> runtime error: timeout </remark></osm>')
+    elements = {obj.sid for obj in ots.parse_osm_stream(io.BytesIO(data), remarks)}
+    assert elements == {'node1', 'node2', 'way3'}
+    assert remarks == ['runtime error: timeout']
+
+
+class FakeResponse:
+    def __init__(self, body, status_code=200):
+        self.status_code = status_code
+        self.text = body.decode()
+        self.raw = FakeRaw(body)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        pass
+
+
+def download_overpass(body, requests=1):
+    session = mock.Mock()
+    session.get.return_value = FakeResponse(body)
+    with mock.patch.object(ots, 'get_session', return_value=session):
+        try:
+            return ots.download_from_overpass([1, 2, 1.01, 2.01], 'http://overpass')
+        finally:
+            assert session.get.call_count == requests
+
+
+def test_overpass_cache_drops_malformed_response(tmp_path):
+    with mock.patch.object(ots, '_CACHE', ots.diskcache.Cache(str(tmp_path))):
+        for _ in range(2):
+            with pytest.raises(etree.XMLSyntaxError):
+                download_overpass(b'<osm><node id="1" version="1"')
+        assert len(ots.get_cache()) == 0
+        assert set(download_overpass(OSM_XML)) == {'node1', 'node2', 'way3'}
+        assert len(ots.get_cache()) == 1
+
+
+def test_overpass_cache_evicts_broken_hit(tmp_path):
+    with mock.patch.object(ots, '_CACHE', ots.diskcache.Cache(str(tmp_path))):
+        download_overpass(OSM_XML)
+        cache = ots.get_cache()
+        key = next(iter(cache))
+        cache.set(key, io.BytesIO(b'<html>Bad gateway'), read=True)
+        with pytest.raises(etree.XMLSyntaxError):
+            download_overpass(b'', requests=0)
+        assert len(cache) == 0
+
+
+def test_overpass_incomplete_response_raises(tmp_path):
+    data = OSM_XML.replace(b'</osm>', b'<remark> runtime error: timeout </remark></osm>')
+    with mock.patch.object(ots, '_CACHE', ots.diskcache.Cache(str(tmp_path))):
+        with pytest.raises(Exception, match='incomplete: runtime error: timeout'):
+            download_overpass(data)
+        assert len(ots.get_cache()) == 0
+
+
+def test_free_element_drops_siblings():
+    root = None
+    for _, el in etree.iterparse(io.BytesIO(OSM_XML), events=('end',), tag='way'):
+        root = el.getparent()
+        ots.free_element(el)
+    assert len(root) == 1 and len(root[0]) == 0
+
+
+def test_get_session_per_retry_mode():
+    with mock.patch.object(ots, '_SESSIONS', {}):
+        retrying = ots.get_session('https://example.com/api/')
+        assert ots.get_session('https://example.com/other/') is retrying
+        plain = ots.get_session('https://example.com/api/', retry=False)
+        assert plain is not retrying
+        assert plain.get_adapter('https://example.com/').max_retries.total == 0
+
+
+def fake_map_api(max_width=0.01, error=400):
+    requested = []
+
+    def api_request(server, endpoint, method='GET', params=None,
+                    raw_result=False, stream_result=False, auth=None, **kwargs):
+        bbox = [float(x) for x in params['bbox'].split(',')]
+        requested.append(bbox)
+        if bbox[2] - bbox[0] > max_width:
+            raise ots.HTTPError(error, server + endpoint, 'Too many nodes')
+        node_id = 1 + int(bbox[0] * 1e6) * 10 ** 7 + int(bbox[1] * 1e6)
+        return FakeRaw(f'<osm><node id="{node_id}" version="1" lon="{bbox[0]}" '
+                       f'lat="{bbox[1]}"/></osm>'.encode())
+    return api_request, requested
+
+
+def test_download_from_api_splits_on_400():
+    api_request, requested = fake_map_api()
+    with mock.patch.object(ots, 'api_request', side_effect=api_request):
+        data = ots.download_from_api([0, 0, 0.02, 0.02], ots.SANDBOX_API)
+    # One rejected request for the whole area, then four quadrants
+    assert len(requested) == 5
+    assert len(data) == 4
+    assert sorted(tuple(b) for b in requested[1:]) == sorted(
+        tuple(b) for b in ots.split_bbox([0, 0, 0.02, 0.02]))
+
+
+def test_download_from_api_presplits_large_bbox():
+    api_request, requested = fake_map_api(max_width=1)
+    with mock.patch.object(ots, 'api_request', side_effect=api_request):
+        data = ots.download_from_api([0, 0, 1, 1], ots.SANDBOX_API)
+    assert len(requested) == len(data) == 4
+
+
+def test_download_from_api_blocked():
+    api_request, _ = fake_map_api(max_width=0, error=509)
+    with mock.patch.object(ots, 'api_request', side_effect=api_request):
+        with pytest.raises(Exception, match='blocked'):
+            ots.download_from_api([0, 0, 0.01, 0.01], ots.SANDBOX_API)
+
+
+def test_download_from_api_other_errors_raise():
+    api_request, requested = fake_map_api(max_width=0, error=500)
+    with mock.patch.object(ots, 'api_request', side_effect=api_request):
+        with pytest.raises(ots.HTTPError) as e:
+            ots.download_from_api([0, 0, 0.01, 0.01], ots.SANDBOX_API)
+    assert e.value.code == 500
+    assert len(requested) == 1
+
+
+def test_download_from_api_rejects_overpass():
+    with pytest.raises(ValueError):
+        ots.download_from_api([0, 0, 0.01, 0.01], ots.OVERPASS_API)